@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+
+API Box + Toy API Benchmark
+
+Starts the toy APIs and api-box locally, replays an interleaved, weighted
+mix of the README endpoints and reports throughput and latency percentiles
+per route class, plus the api-box RSS growth of each class replayed on its
+own. Results can be written as JSON and compared against an earlier report
+to catch regressions.
+
+Usage:
+    python tests/benchmark_stack.py
+    python tests/benchmark_stack.py --mix proxy=4,database=2 --requests 2000
+    python tests/benchmark_stack.py --no-start --output bench.json
+    python tests/benchmark_stack.py --compare bench.json --threshold 15
+
+License: CC-BY-4.0
+
+"""
+
+#
+# IMPORTS
+#
+import argparse
+import http.client
+import importlib.metadata
+import json
+import math
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+#
+# CONSTANTS
+#
+REPO_ROOT = Path(__file__).parent.parent
+BASE_URL = "http://localhost:8000"
+TOY_API_COMMAND = ["pixi", "run", "toy_api", "start", "--all"]
+API_BOX_COMMAND = ["pixi", "run", "api-box", "start"]
+STARTUP_TIMEOUT = 60
+REQUEST_TIMEOUT = 10
+RSS_SAMPLE_INTERVAL = 0.1
+
+# Route classes drawn from the README endpoint list: (path, expected status)
+ROUTE_CLASSES = {
+    "proxy": [
+        ("basic_remote/users", 200),
+        ("basic_remote/users/1005", 200),
+        ("basic_remote/users/1005/profile", 200),
+        ("basic_remote/users/1005/permissions", 200),
+        ("basic_remote/health", 200),
+        ("versioned_remote/1.2/users", 200),
+        ("versioned_remote/1.2/users/1005", 200),
+        ("versioned_remote/1.2/users/1005/posts", 200),
+        ("allowed_routes_remote/users", 200),
+        ("allowed_routes_remote/posts", 200),
+        ("allowed_routes_remote/health", 200),
+    ],
+    "restricted": [
+        ("basic_remote/users/1005/delete", 403),
+        ("basic_remote/admin/5/dangerous", 403),
+        ("restricted_remote/users/1005/permissions", 403),
+        ("restricted_remote/admin/dashboard", 403),
+        ("restricted_remote/system/123/config", 403),
+        ("restricted_remote/users/1005/private", 403),
+        ("allowed_routes_remote/users/1005/settings", 403),
+        ("allowed_routes_remote/admin", 403),
+    ],
+    "latest": [
+        ("versioned_remote/latest/users", 200),
+        ("versioned_remote/latest/users/1005", 200),
+        ("versioned_remote/latest/health", 200),
+        ("versioned_db/latest/users", 200),
+        ("versioned_db/latest/users/1005", 200),
+        ("versioned_db/latest/users/1005/permissions", 200),
+    ],
+    "database": [
+        ("test_db/users", 200),
+        ("test_db/users/1005", 200),
+        ("test_db/users/1005/permissions", 200),
+        ("test_db/users/1005/posts", 200),
+        ("test_db/users/active", 200),
+        ("test_db/posts", 200),
+        ("test_db/posts/10", 200),
+        ("versioned_db/1.2/users", 200),
+        ("versioned_db/1.2/posts", 200),
+    ],
+}
+
+DEFAULT_MIX = "proxy=4,restricted=1,latest=2,database=3"
+
+# api-box root plus one route per configured remote (and version), all expected to return 200
+READINESS_ROUTES = [
+    "",
+    "basic_remote/health",
+    "custom_mapping_remote/users",
+    "restricted_remote/health",
+    "allowed_routes_remote/health",
+    "versioned_remote/0.1/health",
+    "versioned_remote/0.2/health",
+    "versioned_remote/1.2/health",
+    "test_db/users",
+    "versioned_db/latest/users",
+]
+
+#
+# PUBLIC
+#
+def parse_mix(mix):
+    """Parse a 'class=weight,...' string into a dict of route class weights."""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name in weights:
+            raise ValueError(f"Route class '{name}' is listed more than once")
+        if name not in ROUTE_CLASSES:
+            raise ValueError(f"Unknown route class '{name}' (expected one of {', '.join(ROUTE_CLASSES)})")
+        try:
+            value = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight '{weight}' for route class '{name}'")
+        if not (math.isfinite(value) and value > 0):
+            raise ValueError(f"Weight for route class '{name}' must be a positive number, got '{weight}'")
+        weights[name] = value
+    return weights
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def process_tree_rss(pid, include_root=True):
+    """Return the summed RSS in bytes of a process and its descendants (Linux only).
+
+    With include_root=False only the descendants are counted, which leaves out a
+    launcher such as `pixi run`. Returns None if the process does not exist.
+    """
+    proc = Path("/proc")
+    if pid is None or not proc.exists():
+        return None
+    root_rss = _read_rss(proc / str(pid) / "status")
+    if root_rss is None:
+        return None
+
+    children = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # ppid is the second field after the parenthesised command name
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    total = root_rss if include_root else 0
+    pending = list(children.get(pid, []))
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        total += _read_rss(proc / str(current) / "status") or 0
+    return total
+
+
+def fetch(url):
+    """Issue a GET request and return (status code, latency in seconds), with status 0 on failure."""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=REQUEST_TIMEOUT) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except (OSError, http.client.HTTPException):
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def allocate_requests(weights, nb_requests):
+    """Split nb_requests across route classes by weight, at least one each, summing exactly."""
+    if nb_requests < len(weights):
+        raise ValueError(f"--requests must be at least {len(weights)} (one per route class), got {nb_requests}")
+
+    # one request per class, then largest-remainder split of the rest
+    spare = nb_requests - len(weights)
+    total_weight = sum(weights.values())
+    shares = {name: spare * weight / total_weight for name, weight in weights.items()}
+    counts = {name: 1 + int(share) for name, share in shares.items()}
+    leftover = nb_requests - sum(counts.values())
+    for name in sorted(shares, key=lambda name: shares[name] - int(shares[name]), reverse=True)[:leftover]:
+        counts[name] += 1
+    return counts
+
+
+def build_jobs(counts, seed=0):
+    """Return interleaved (route class, path, expected status) jobs for the given per-class counts."""
+    jobs = []
+    for name, count in counts.items():
+        routes = ROUTE_CLASSES[name]
+        jobs.extend((name, *routes[i % len(routes)]) for i in range(count))
+    random.Random(seed).shuffle(jobs)
+    return jobs
+
+
+def replay(jobs, concurrency, base_url):
+    """Send every job through one client pool and return (results, elapsed seconds)."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda job: fetch(f"{base_url}/{job[1]}"), jobs))
+    return results, time.perf_counter() - start
+
+
+def summarize(jobs, results, elapsed):
+    """Return request count, errors, throughput and latency percentiles for a set of jobs."""
+    latencies = [latency * 1000 for _, latency in results]
+    errors = sum(1 for (status, _), job in zip(results, jobs) if status != job[2])
+    return {
+        "requests": len(jobs),
+        "errors": errors,
+        "throughput_rps": _round(len(jobs) / elapsed if elapsed else None),
+        "latency_ms": {
+            "p50": _round(percentile(latencies, 50)),
+            "p95": _round(percentile(latencies, 95)),
+            "p99": _round(percentile(latencies, 99)),
+            "max": _round(max(latencies) if latencies else None),
+        },
+    }
+
+
+def measure_rss(jobs, concurrency, base_url, api_box_pid, include_root=True):
+    """Replay one route class on its own and return the api-box RSS growth it caused."""
+    # RSS rarely shrinks, so measure growth over the baseline left by earlier classes
+    baseline_rss = process_tree_rss(api_box_pid, include_root)
+    peak_rss = [baseline_rss]
+    done = threading.Event()
+
+    def record_rss():
+        rss = process_tree_rss(api_box_pid, include_root)
+        if rss is not None:
+            peak_rss[0] = max(peak_rss[0] or 0, rss)
+
+    def sample_rss():
+        while True:
+            record_rss()
+            if done.wait(RSS_SAMPLE_INTERVAL):
+                break
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    results, _ = replay(jobs, concurrency, base_url)
+    done.set()
+    sampler.join()
+    # classes shorter than one sample interval would otherwise report no growth
+    record_rss()
+
+    return {
+        "rss_baseline_mb": _mb(baseline_rss),
+        "rss_peak_mb": _mb(peak_rss[0]),
+        "rss_delta_mb": _mb(peak_rss[0] - baseline_rss if baseline_rss is not None else None),
+        "rss_run_errors": sum(1 for (status, _), job in zip(results, jobs) if status != job[2]),
+    }
+
+
+def start_stack(base_url):
+    """Start the toy APIs and api-box, returning both processes once every remote responds."""
+    if fetch(f"{base_url}/")[0] != 0:
+        raise RuntimeError(f"{base_url} is already serving; stop it or use --no-start")
+
+    processes = []
+    try:
+        for command in (TOY_API_COMMAND, API_BOX_COMMAND):
+            processes.append(subprocess.Popen(command, start_new_session=True,
+                                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    except OSError as e:
+        stop_stack(*processes)
+        raise RuntimeError(f"Failed to run '{' '.join(command)}': {e}")
+    toy_api, api_box = processes
+
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        for name, process in (("toy_api", toy_api), ("api-box", api_box)):
+            if process.poll() is not None:
+                stop_stack(toy_api, api_box)
+                raise RuntimeError(f"{name} exited during startup with code {process.returncode}")
+        if all(fetch(f"{base_url}/{path}")[0] == 200 for path in READINESS_ROUTES):
+            return toy_api, api_box
+        time.sleep(0.5)
+
+    stop_stack(toy_api, api_box)
+    raise RuntimeError(f"api-box and toy APIs did not become ready at {base_url} within {STARTUP_TIMEOUT}s")
+
+
+def stop_stack(*processes):
+    """Terminate the process groups started by start_stack."""
+    for process in processes:
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=10)
+        except ProcessLookupError:
+            process.wait()
+        except subprocess.TimeoutExpired:
+            # kill the whole group so child servers don't keep holding their ports
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            process.wait()
+
+
+def run_benchmark(weights, nb_requests, concurrency, base_url, api_box_pid, include_root=True):
+    """Replay the weighted mix and return the full benchmark report.
+
+    All classes are interleaved in one client pool so they contend with each other
+    as they would in production; per-class throughput is the class's share of that
+    mixed run. RSS growth is then measured by replaying each class on its own.
+    """
+    counts = allocate_requests(weights, nb_requests)
+
+    # Warm-up pass so connection setup and first-load costs are not counted
+    for name in weights:
+        for path, _ in ROUTE_CLASSES[name]:
+            fetch(f"{base_url}/{path}")
+
+    jobs = build_jobs(counts)
+    print(f"Running mix: {len(jobs)} requests (concurrency {concurrency})...")
+    results, elapsed = replay(jobs, concurrency, base_url)
+
+    per_class = {}
+    for name in counts:
+        pairs = [(job, result) for job, result in zip(jobs, results) if job[0] == name]
+        per_class[name] = summarize([job for job, _ in pairs], [result for _, result in pairs], elapsed)
+
+    measure = process_tree_rss(api_box_pid, include_root) is not None
+    for name, count in counts.items():
+        if measure:
+            print(f"Measuring RSS for {name}: {count} requests...")
+            per_class[name].update(measure_rss(build_jobs({name: count}), concurrency, base_url,
+                                               api_box_pid, include_root))
+        else:
+            per_class[name].update(rss_baseline_mb=None, rss_peak_mb=None, rss_delta_mb=None, rss_run_errors=0)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "base_url": base_url,
+            "requests": len(jobs),
+            "concurrency": concurrency,
+            "mix": weights,
+            "allocation": counts,
+            "versions": {name: _package_version(name) for name in ("api_box", "toy_api")},
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "platform": platform.platform(),
+        },
+        "overall": summarize(jobs, results, elapsed),
+        "results": per_class,
+    }
+
+
+def compare_reports(old, new, threshold):
+    """Return regressions of more than threshold percent in p95 latency or throughput."""
+    regressions = []
+    sections = [("overall", old.get("overall"), new.get("overall"))]
+    sections += [(name, old.get("results", {}).get(name), result) for name, result in new["results"].items()]
+
+    for name, before, after in sections:
+        if not before or not after:
+            continue
+        old_p95, new_p95 = before["latency_ms"]["p95"], after["latency_ms"]["p95"]
+        if old_p95 and new_p95 is not None and new_p95 > old_p95 * (1 + threshold / 100):
+            regressions.append(f"{name}: p95 {old_p95:.2f} -> {new_p95:.2f} ms "
+                               f"(+{(new_p95 / old_p95 - 1) * 100:.1f}%)")
+        old_rps, new_rps = before["throughput_rps"], after["throughput_rps"]
+        if old_rps and new_rps is not None and new_rps < old_rps * (1 - threshold / 100):
+            regressions.append(f"{name}: throughput {old_rps:.2f} -> {new_rps:.2f} req/s "
+                               f"(-{(1 - new_rps / old_rps) * 100:.1f}%)")
+    return regressions
+
+
+def print_report(report):
+    """Print a human readable summary of a benchmark report."""
+    print("\n" + "=" * 78)
+    print("BENCHMARK RESULTS")
+    print("=" * 78)
+    print("(latency and req/s from the interleaved mix; +rss MB: api-box RSS growth while")
+    print(" replaying each class on its own, over the baseline taken just before it)")
+    print(f"{'class':<12}{'reqs':>7}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'+rss MB':>10}")
+    rows = list(report["results"].items()) + [("overall", dict(report["overall"], rss_delta_mb=None))]
+    for name, result in rows:
+        latency = result["latency_ms"]
+        print(f"{name:<12}{result['requests']:>7}{result['errors']:>8}"
+              f"{_fmt(result['throughput_rps']):>10}{_fmt(latency['p50']):>10}"
+              f"{_fmt(latency['p95']):>10}{_fmt(latency['p99']):>10}{_fmt(result['rss_delta_mb']):>10}")
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"route class weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--requests", type=int, default=1000, help="total requests in the mixed run")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--base-url", default=BASE_URL, help="api-box base url")
+    parser.add_argument("--no-start", action="store_true", help="use already running toy APIs and api-box")
+    parser.add_argument("--api-box-pid", type=int, help="api-box server pid to sample RSS from (with --no-start)")
+    parser.add_argument("--output", help="write the JSON report to this path")
+    parser.add_argument("--compare", help="earlier JSON report to check for regressions against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="allowed p95 / throughput regression in percent (default: 10)")
+    args = parser.parse_args()
+
+    try:
+        weights = parse_mix(args.mix)
+        allocate_requests(weights, args.requests)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    if args.concurrency < 1:
+        print(f"✗ --concurrency must be at least 1, got {args.concurrency}")
+        return 1
+    if not (math.isfinite(args.threshold) and args.threshold >= 0):
+        print(f"✗ --threshold must be a non-negative number, got {args.threshold}")
+        return 1
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = json.loads(Path(args.compare).read_text())
+        except (OSError, ValueError) as e:
+            print(f"✗ Failed to read comparison report {args.compare}: {e}")
+            return 1
+
+    processes = ()
+    api_box_pid = args.api_box_pid
+    if not args.no_start:
+        try:
+            processes = start_stack(args.base_url)
+        except RuntimeError as e:
+            print(f"✗ {e}")
+            return 1
+        # pid of the `pixi run` launcher; only its descendants are counted
+        api_box_pid = processes[1].pid
+        print("✓ Toy APIs and api-box started")
+
+    try:
+        report = run_benchmark(weights, args.requests, args.concurrency, args.base_url, api_box_pid,
+                               include_root=args.no_start)
+    finally:
+        stop_stack(*processes)
+
+    print_report(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\n✓ Wrote JSON report to {args.output}")
+
+    failed = any(result["errors"] or result["rss_run_errors"] for result in report["results"].values())
+
+    if baseline is not None:
+        regressions = compare_reports(baseline, report, args.threshold)
+        print(f"\nComparison with {args.compare} (threshold {args.threshold:g}%):")
+        for regression in regressions:
+            print(f"✗ {regression}")
+        if not regressions:
+            print("✓ No p95 latency or throughput regressions")
+        failed |= bool(regressions)
+
+    return 1 if failed else 0
+
+
+#
+# INTERNAL
+#
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def _package_version(name):
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _mb(nb_bytes):
+    return _round(nb_bytes / 2**20 if nb_bytes is not None else None)
+
+
+def _read_rss(status_path):
+    try:
+        for line in status_path.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    # kernel threads and zombies have no VmRSS line
+    return 0
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+if __name__ == "__main__":
+    sys.exit(main())
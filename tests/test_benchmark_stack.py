@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test the benchmark harness helpers that don't need a running stack
+
+License: CC-BY-4.0
+"""
+
+#
+# IMPORTS
+#
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmark_stack import allocate_requests, compare_reports, parse_mix, percentile, process_tree_rss
+
+#
+# CONSTANTS
+#
+MISSING_PID = 2**22 + 1  # above the default Linux pid_max
+
+
+#
+# PUBLIC
+#
+def test_parse_mix():
+    """Test route class weight parsing and validation."""
+    print("Testing parse_mix")
+    print("=" * 50)
+
+    valid = [
+        ("proxy=4,restricted=1,latest=2,database=3", {"proxy": 4.0, "restricted": 1.0, "latest": 2.0, "database": 3.0}),
+        ("proxy", {"proxy": 1.0}),
+        ("proxy=0.5, database=2", {"proxy": 0.5, "database": 2.0}),
+    ]
+    invalid = [
+        "proxy=0",
+        "proxy=-1,database=2",
+        "proxy=nan",
+        "proxy=inf",
+        "proxy=abc",
+        "unknown=1",
+        "proxy=1,proxy=2",
+    ]
+
+    failed = 0
+    for mix, expected in valid:
+        result = parse_mix(mix)
+        ok = result == expected
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} '{mix}' -> {result}")
+
+    for mix in invalid:
+        try:
+            parse_mix(mix)
+            ok = False
+        except ValueError:
+            ok = True
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} '{mix}' rejected: {ok}")
+
+    print(f"\nResults: {len(valid) + len(invalid) - failed} passed, {failed} failed")
+    assert failed == 0
+
+
+def test_allocate_requests():
+    """Test that requests are split by weight, at least one per class, summing exactly."""
+    print("Testing allocate_requests")
+    print("=" * 50)
+
+    tests = [
+        ({"proxy": 4, "restricted": 1, "latest": 2, "database": 3}, 1000),
+        ({"proxy": 4, "restricted": 1, "latest": 2, "database": 3}, 4),
+        ({"proxy": 1, "database": 1000}, 7),
+        ({"proxy": 1, "restricted": 1, "latest": 1}, 10),
+    ]
+
+    failed = 0
+    for weights, nb_requests in tests:
+        counts = allocate_requests(weights, nb_requests)
+        ok = sum(counts.values()) == nb_requests and min(counts.values()) >= 1
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} {nb_requests} over {weights} -> {counts}")
+
+    counts = allocate_requests({"proxy": 4, "restricted": 1, "latest": 2, "database": 3}, 1004)
+    ok = counts == {"proxy": 401, "restricted": 101, "latest": 201, "database": 301}
+    failed += not ok
+    print(f"{'✅' if ok else '❌'} proportional split -> {counts}")
+
+    for nb_requests in (0, -5, 1):
+        try:
+            allocate_requests({"proxy": 1, "database": 1}, nb_requests)
+            ok = False
+        except ValueError:
+            ok = True
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} {nb_requests} requests rejected: {ok}")
+
+    print(f"\nResults: {len(tests) + 4 - failed} passed, {failed} failed")
+    assert failed == 0
+
+
+def test_percentile():
+    """Test nearest-rank percentile edge cases."""
+    print("Testing percentile")
+    print("=" * 50)
+
+    values = list(range(1, 11))
+    tests = [
+        ([], 50, None),
+        ([7.5], 50, 7.5),
+        ([7.5], 99, 7.5),
+        (values, 0, 1),
+        (values, 50, 5),
+        (values, 95, 10),
+        (values, 100, 10),
+        ([3, 1, 2], 50, 2),
+    ]
+
+    failed = 0
+    for data, pct, expected in tests:
+        result = percentile(data, pct)
+        ok = result == expected
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} p{pct} of {data}: {result} (expected {expected})")
+
+    print(f"\nResults: {len(tests) - failed} passed, {failed} failed")
+    assert failed == 0
+
+
+def test_process_tree_rss():
+    """Test RSS lookup for missing and live processes."""
+    print("Testing process_tree_rss")
+    print("=" * 50)
+
+    tests = [
+        ("no pid", process_tree_rss(None) is None),
+        ("missing pid", process_tree_rss(MISSING_PID) is None),
+        ("missing pid, descendants only", process_tree_rss(MISSING_PID, include_root=False) is None),
+    ]
+    if Path("/proc").exists():
+        own = process_tree_rss(os.getpid())
+        tests.append(("own pid", own is not None and own > 0))
+        tests.append(("own pid, descendants only", process_tree_rss(os.getpid(), include_root=False) == 0))
+
+    failed = 0
+    for description, ok in tests:
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} {description}")
+
+    print(f"\nResults: {len(tests) - failed} passed, {failed} failed")
+    assert failed == 0
+
+
+def test_compare_reports():
+    """Test regression detection between two reports."""
+    print("Testing compare_reports")
+    print("=" * 50)
+
+    def report(p95, rps):
+        result = {"latency_ms": {"p95": p95}, "throughput_rps": rps}
+        return {"overall": result, "results": {"proxy": result}}
+
+    tests = [
+        ("unchanged", report(10.0, 100.0), report(10.0, 100.0), 0),
+        ("within threshold", report(10.0, 100.0), report(10.9, 91.0), 0),
+        ("slower p95", report(10.0, 100.0), report(12.0, 100.0), 2),
+        ("lower throughput", report(10.0, 100.0), report(10.0, 80.0), 2),
+        ("both", report(10.0, 100.0), report(12.0, 80.0), 4),
+        ("missing class in old report", {"overall": None, "results": {}}, report(12.0, 80.0), 0),
+    ]
+
+    failed = 0
+    for description, old, new, expected in tests:
+        regressions = compare_reports(old, new, threshold=10)
+        ok = len(regressions) == expected
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} {description}: {regressions}")
+
+    print(f"\nResults: {len(tests) - failed} passed, {failed} failed")
+    assert failed == 0
+
+
+if __name__ == "__main__":
+    test_parse_mix()
+    test_allocate_requests()
+    test_percentile()
+    test_process_tree_rss()
+    test_compare_reports()